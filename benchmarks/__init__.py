@@ -0,0 +1,46 @@
+"""Benchmarks of the demo workloads against the simulated backend in `presto_sim`.
+
+The classes follow the asv conventions (`params`, `param_names`, `time_*`, `peakmem_*`)
+and are run with `python -m benchmarks.run`; `items` gives the work done for throughput.
+
+Every workload calls the `measure` function of a demo with the instrument classes patched by
+`presto_profile.Profiler`. Wall time and peak memory include the simulator, which usually
+dominates them. The host time is the self time of `measure`, i.e. without the calls into the
+instrument (connecting, uploading, running and downloading), and is what catches regressions
+in the demos' own code.
+"""
+
+import contextlib
+import importlib
+import io
+
+import presto_sim
+from presto_profile import Profiler
+
+# instrument classes whose calls are excluded from the host time
+INSTRUMENTS = (
+    (presto_sim.pulsed, "Pulsed"),
+    (presto_sim.lockin, "Lockin"),
+    (presto_sim.lockin, "SymmetricLockin"),
+)
+
+
+def measure(name, **kwargs):
+    """Run `measure(**kwargs)` of the demo module `name` against the simulator.
+
+    Returns:
+        the `Profiler` with the `measure` phase and every instrument call, see `host_time`
+    """
+    profiler = Profiler()
+    with presto_sim.installed(), contextlib.ExitStack() as stack:
+        module = importlib.import_module(name)
+        for namespace, attr in INSTRUMENTS:
+            stack.enter_context(profiler.patch(namespace, attr))
+        with contextlib.redirect_stdout(io.StringIO()), profiler.phase("measure"):
+            module.measure(**kwargs)
+    return profiler
+
+
+def host_time(profiler):
+    """Time spent in the demo's own code, the self time of the `measure` phase."""
+    return profiler.summary()["measure"]["self"]
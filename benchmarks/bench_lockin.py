@@ -0,0 +1,23 @@
+"""Lock-in demos at parameterized sizes, see `benchmarks`."""
+
+from benchmarks import measure
+
+NSUM = 250  # default of `symmetric_lockin_1.py`
+
+
+class SymmetricLockin:
+    params = ([24, 96, 192], [10, 100])
+    param_names = ["nr_freqs", "nr_meas"]
+
+    def _workload(self, nr_freqs, nr_meas):
+        return measure("symmetric_lockin_1", nr_freqs=nr_freqs, nr_meas=nr_meas)
+
+    def time_workload(self, nr_freqs, nr_meas):
+        return self._workload(nr_freqs, nr_meas)
+
+    def peakmem_workload(self, nr_freqs, nr_meas):
+        self._workload(nr_freqs, nr_meas)
+
+    def items(self, nr_freqs, nr_meas):
+        """Number of complex lock-in values acquired, raw and summed."""
+        return nr_freqs * nr_meas * (NSUM + 1)
@@ -0,0 +1,60 @@
+"""Pulsed-mode demos at parameterized sizes, see `benchmarks`."""
+
+from benchmarks import measure
+
+TEMPLATES_PER_PORT = 16  # fixed in `demo_2_all_templates.py`
+
+
+class AllTemplates:
+    params = [1, 4, 8]
+    param_names = ["nr_ports"]
+
+    def _workload(self, nr_ports):
+        ports = range(9, 9 + nr_ports)
+        return measure("demo_2_all_templates", input_ports=ports, output_ports=ports)
+
+    def time_workload(self, nr_ports):
+        return self._workload(nr_ports)
+
+    def peakmem_workload(self, nr_ports):
+        self._workload(nr_ports)
+
+    def items(self, nr_ports):
+        """Number of output templates."""
+        return TEMPLATES_PER_PORT * nr_ports
+
+
+class LongPulses:
+    params = [14_000, 28_000, 56_000]
+    param_names = ["nr_samples"]
+
+    def _workload(self, nr_samples):
+        return measure("demo_3_long_pulses", nr_samples=nr_samples)
+
+    def time_workload(self, nr_samples):
+        return self._workload(nr_samples)
+
+    def peakmem_workload(self, nr_samples):
+        self._workload(nr_samples)
+
+    def items(self, nr_samples):
+        """Number of DAC samples uploaded."""
+        return 2 * nr_samples
+
+
+class TemplateMatch:
+    params = [64, 128, 256, 512]
+    param_names = ["nr_entries"]
+
+    def _workload(self, nr_entries):
+        return measure("demo_6_template_match", nr_entries=nr_entries)
+
+    def time_workload(self, nr_entries):
+        return self._workload(nr_entries)
+
+    def peakmem_workload(self, nr_entries):
+        self._workload(nr_entries)
+
+    def items(self, nr_entries):
+        """Number of template matches."""
+        return nr_entries
@@ -0,0 +1,131 @@
+"""Run the benchmarks and record throughput and peak memory.
+
+Run from the repository root:
+
+    python -m benchmarks.run                          # all benchmarks
+    python -m benchmarks.run TemplateMatch            # only classes matching a name
+    python -m benchmarks.run --json new.json          # save results
+    python -m benchmarks.run --compare old.json       # fail on regressions against old results
+
+Time is the best of `--repeat` runs, both the wall time and the host time spent in the
+demo's own code, see `benchmarks`. Wall time and peak memory include the simulator. Peak
+memory is the largest amount of memory allocated through Python and NumPy during one run, as
+traced by `tracemalloc`. Throughput is per second of wall time.
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks import bench_lockin, bench_pulsed, host_time
+
+MODULES = (bench_pulsed, bench_lockin)
+
+
+def _benchmarks(selected):
+    for module in MODULES:
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__ or not hasattr(cls, "params"):
+                continue
+            if selected and not any(s in name for s in selected):
+                continue
+            params = cls.params
+            if not isinstance(params, tuple):
+                params = (params,)
+            for combination in itertools.product(*params):
+                yield name, cls(), combination
+
+
+def _key(name, combination):
+    return f"{name}({', '.join(str(p) for p in combination)})"
+
+
+def measure(bench, combination, repeat):
+    best = host = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        profiler = bench.time_workload(*combination)
+        best = min(best, time.perf_counter() - start)
+        host = min(host, host_time(profiler))
+
+    tracemalloc.start()
+    try:
+        bench.peakmem_workload(*combination)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "time": best,
+        "host": host,
+        "throughput": bench.items(*combination) / best,
+        "peakmem": peak,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """List the benchmarks that got slower or use more memory than `baseline`."""
+    regressions = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        if new["time"] > old["time"] * (1 + tolerance):
+            regressions.append(f"{key}: time {old['time']:.4f} s -> {new['time']:.4f} s")
+        if "host" in old and new["host"] > old["host"] * (1 + tolerance):
+            regressions.append(f"{key}: host {old['host']:.4f} s -> {new['host']:.4f} s")
+        if new["peakmem"] > old["peakmem"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: peakmem {old['peakmem'] / 1e6:.1f} MB -> {new['peakmem'] / 1e6:.1f} MB"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("select", nargs="*", help="only run benchmark classes matching these")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per benchmark")
+    parser.add_argument("--json", metavar="PATH", help="save results to PATH")
+    parser.add_argument("--compare", metavar="PATH", help="compare against results in PATH")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative slowdown or memory growth reported as a regression (default 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(
+        f"{'benchmark':<40} {'time [s]':>10} {'host [s]':>10} {'items/s':>12}"
+        f" {'peak [MB]':>10}"
+    )
+    for name, bench, combination in _benchmarks(args.select):
+        key = _key(name, combination)
+        results[key] = res = measure(bench, combination, args.repeat)
+        print(
+            f"{key:<40} {res['time']:>10.4f} {res['host']:>10.4f} {res['throughput']:>12.4g}"
+            f" {res['peakmem'] / 1e6:>10.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,14 +12,13 @@ with oscilloscope on port 10.
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 from presto import lockin
 from presto.utils import untwist_downconversion
 
-
 # address of the instrument used
 ADDRESS = "192.168.20.4"
+EXT_REF = False  # set to True to use external 10 MHz reference
 
 # input port used in this measurement
 INPUT_PORT = 9
@@ -51,88 +50,141 @@ NSTORE = 1000
 NAVERAGE = 900
 
 
-fig, ax = plt.subplots(tight_layout=True)
-fig.show()
-
-# Create an instance of the Lockin class to access the instrument
-# Use the digital mixers for both ADC and DAC, 6.4 GSPS for the
-# DAC and 3.2 GSPS for the ADC
-with lockin.Lockin(
-    ext_ref_clk=False,
+def measure(
     address=ADDRESS,
-    adc_mode=lockin.AdcMode.Mixed,
-    dac_mode=lockin.DacMode.Mixed,
-) as lck:
-    # Setup output to drive a few tones at different frequencies and
-    # with different detuning with respect to df
-    N = 6
-    fout = np.arange(N) * 50e6 + 25e6
-    fdet = np.array([0, 10, 100, 1000, 10000, 50000])
-
-    # Add an output group with N frequencies. This group can be output on
-    # any number of ports. More output groups can be added, and each group
-    # can target any port set. Multiple groups can be output on the same port.
-    output_group = lck.add_output_group(OUTPUT_PORTS, nr_freq=N)
-    output_group.set_frequencies(fout + fdet)
-    output_group.set_amplitudes(
-        [
-            1.0 / N,
-        ]
-        * N
-    )
-    output_group.set_phases(
-        [
-            0,
-        ]
-        * N,
-        [
-            -np.pi / 2,
-        ]
-        * N,
-    )  # upper sideband
-
-    # the frequencies to measure
-    f_raw = np.arange(nr_freq * nr_iter) * df + df
-    comb_f, df = lck.tune(f_raw, df)
-    comb_a = np.ones(nr_freq) / nr_freq
-
-    # Set up the digital mixers for adc and dac to mix the IF signals
-    # with a carrier, the outputs was setup to drive the upper sideband.
-    lck.hardware.configure_mixer(mix_f, in_ports=INPUT_PORT, out_ports=OUTPUT_PORTS)
-
-    # Set df used in this measurement
-    lck.set_df(df)
-
-    # Create an input group. An input group can only be connected to one
-    # input. To measure at multiple inputs, create more groups.
-    # The total number of frequencies available is limited, depending one
-    # the instrument version used and the number of output frequencies used.
-    input_group = lck.add_input_group(INPUT_PORT, nr_freq)
-
-    # run nr_iter measurements
-    for i in range(nr_iter):
-        # the frequencies measured are updated every iteration
-        # the meeasurement is interleaved to make it easier to see
-        # effects of drifts during the sweep
-        input_group.set_frequencies(comb_f[i::nr_iter])
+    ext_ref=EXT_REF,
+    input_port=INPUT_PORT,
+    output_ports=OUTPUT_PORTS,
+    df=df,
+    nr_freq=nr_freq,
+    nr_iter=nr_iter,
+    mix_f=mix_f,
+    nstore=NSTORE,
+    naverage=NAVERAGE,
+    callback=None,
+):
+    """Run the sweep.
+
+    `callback(i, freq, hsb_db)` is called after each of the `nr_iter` iterations with the
+    frequencies measured in that iteration and the upper-sideband response in dB.
+    """
+    freq_arr = np.zeros((nr_iter, nr_freq))
+    hsb_db_arr = np.zeros((nr_iter, nr_freq))
+
+    # Create an instance of the Lockin class to access the instrument
+    # Use the digital mixers for both ADC and DAC, 6.4 GSPS for the
+    # DAC and 3.2 GSPS for the ADC
+    with lockin.Lockin(
+        ext_ref_clk=ext_ref,
+        address=address,
+        adc_mode=lockin.AdcMode.Mixed,
+        dac_mode=lockin.DacMode.Mixed,
+    ) as lck:
+        # Setup output to drive a few tones at different frequencies and
+        # with different detuning with respect to df
+        N = 6
+        fout = np.arange(N) * 50e6 + 25e6
+        fdet = np.array([0, 10, 100, 1000, 10000, 50000])
+
+        # Add an output group with N frequencies. This group can be output on
+        # any number of ports. More output groups can be added, and each group
+        # can target any port set. Multiple groups can be output on the same port.
+        output_group = lck.add_output_group(output_ports, nr_freq=N)
+        output_group.set_frequencies(fout + fdet)
+        output_group.set_amplitudes(
+            [
+                1.0 / N,
+            ]
+            * N
+        )
+        output_group.set_phases(
+            [
+                0,
+            ]
+            * N,
+            [
+                -np.pi / 2,
+            ]
+            * N,
+        )  # upper sideband
+
+        # the frequencies to measure
+        f_raw = np.arange(nr_freq * nr_iter) * df + df
+        comb_f, df = lck.tune(f_raw, df)
+
+        # Set up the digital mixers for adc and dac to mix the IF signals
+        # with a carrier, the outputs was setup to drive the upper sideband.
+        lck.hardware.configure_mixer(mix_f, in_ports=input_port, out_ports=output_ports)
+
+        # Set df used in this measurement
+        lck.set_df(df)
+
+        # Create an input group. An input group can only be connected to one
+        # input. To measure at multiple inputs, create more groups.
+        # The total number of frequencies available is limited, depending one
+        # the instrument version used and the number of output frequencies used.
+        input_group = lck.add_input_group(input_port, nr_freq)
+
+        # run nr_iter measurements
+        for i in range(nr_iter):
+            # the frequencies measured are updated every iteration
+            # the meeasurement is interleaved to make it easier to see
+            # effects of drifts during the sweep
+            input_group.set_frequencies(comb_f[i::nr_iter])
+            lck.apply_settings()
+
+            # During apply_settings all outputs are turned off and on which causes a
+            # transient behaviour in the system. For sensitive measurements, give the
+            # outputs/inputs some time to stabilize. An option (for lower df measurements)
+            # is to capture pixels during this time and see the system stabilize.
+            lck.hardware.sleep(0.1, False)
+
+            # Measure a number of pixels
+            pixel_dict = lck.get_pixels(nstore)
+            freq, pixel_i, pixel_q = pixel_dict[input_port]
+            lsb, hsb = untwist_downconversion(pixel_i, pixel_q)
+            freq_arr[i] = freq
+            hsb_db_arr[i] = 20 * np.log10(np.mean(np.abs(hsb[-naverage:]), axis=0))
+            if callback is not None:
+                callback(i, mix_f + freq, hsb_db_arr[i])
+            print(f"{i}/{nr_iter}")
+
+        # Set all outputs to 0
+        output_group.set_amplitudes(0)
         lck.apply_settings()
 
-        # During apply_settings all outputs are turned off and on which causes a
-        # transient behaviour in the system. For sensitive measurements, give the
-        # outputs/inputs some time to stabilize. An option (for lower df measurements)
-        # is to capture pixels during this time and see the system stabilize.
-        lck.hardware.sleep(0.1, False)
-
-        # Measure a number of pixels
-        pixel_dict = lck.get_pixels(NSTORE)
-        freq, pixel_i, pixel_q = pixel_dict[INPUT_PORT]
-        lsb, hsb = untwist_downconversion(pixel_i, pixel_q)
-        # plot the high sideband
-        ax.plot(mix_f + freq, 20 * np.log10(np.mean(np.abs(hsb[-NAVERAGE:]), axis=0)), "b.")
-        fig.canvas.draw()
-        plt.pause(0.1)
-        print(f"{i}/{nr_iter}")
-
-    # Set all outputs to 0
-    output_group.set_amplitudes(0)
-    lck.apply_settings()
+    return {"freq": mix_f + freq_arr, "hsb_db": hsb_db_arr}
+
+
+def live_plot(df=df, nr_freq=nr_freq, nr_iter=nr_iter, mix_f=mix_f, **kwargs):
+    """Return a monitor that plots the high sideband as it is measured.
+
+    Takes the same keyword arguments as `measure`, the others are ignored. Use it as
+    `monitor.run(measure, callback=monitor.update, **kwargs)`, to measure in the background
+    while the plot is updated.
+    """
+    import matplotlib.pyplot as plt
+
+    from presto_plot import LiveMonitor
+
+    fig, ax = plt.subplots(tight_layout=True)
+    # the sweep covers mix_f + df to mix_f + nr_iter * nr_freq * df
+    xlim = (mix_f, mix_f + (nr_iter * nr_freq + 1) * df)
+    monitor = LiveMonitor(ax, capacity=nr_iter * nr_freq, xlim=xlim, marker=".", color="b")
+    fig.show()
+    return monitor
+
+
+def plot(freq, hsb_db):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(tight_layout=True)
+    # plot the high sideband
+    ax.plot(freq.ravel(), hsb_db.ravel(), "b.")
+    fig.show()
+    return fig
+
+
+if __name__ == "__main__":
+    monitor = live_plot()
+    monitor.run(measure, callback=monitor.update)
@@ -0,0 +1,271 @@
+"""Average store and template-matching data over repeated runs of the same sequence.
+
+`num_averages` averages inside a single `Pulsed.run`. When more averages are needed than one
+run allows, or runs of different conditions are interleaved, `Accumulator` sums the data of
+every run in place into preallocated arrays instead of collecting results in Python lists:
+
+    def program(pls):
+        ...  # the pls.output_pulse, pls.store, pls.match, ... calls of the sequence
+
+    with pulsed.Pulsed(address=ADDRESS) as pls:
+        ...  # set up stores, templates and lookup tables as usual
+        acc = Accumulator(pls, match_pairs=[match_pair])
+        acc.run(20, program, period=10e-6, repeat_count=NFREQ, num_averages=1000)
+        t_arr = acc.t_arr
+        data = acc.store_mean()
+        match_i, match_q = acc.match_mean(match_pair)
+
+`Pulsed.run` clears the sequence of instructions, so `program` defines it before every run.
+To interleave conditions, keep one accumulator per condition and call `add_run` after each
+`run` of that condition.
+
+With `shared=True` the sums live in a `multiprocessing.shared_memory` block. Other processes
+attach to it with `SharedView(acc.spec)` and read the running averages without copying the
+data:
+
+    view = SharedView(spec)  # in the worker process
+    count, store_mean, match_means = view.snapshot()
+"""
+
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# int64 header slots at the start of the buffer
+_SEQUENCE = 0  # odd while a run is being added, see `SharedView.snapshot`
+_COUNT = 1  # number of runs summed
+_HEADER_BYTES = 16
+_ALIGN = 16
+
+# wait before reading again while a run is being added
+_RETRY_INTERVAL = 1e-4
+
+# held while `SharedView` replaces `resource_tracker.register` on Python < 3.13
+_REGISTER_LOCK = threading.Lock()
+
+
+def _layout(spec):
+    """Byte offsets of the store sum and of each template-matching sum in the buffer."""
+    offsets = []
+    offset = _HEADER_BYTES
+    shapes = [(spec["store_shape"], spec["store_dtype"])]
+    shapes += [(shape, "float64") for shape in spec["match_shapes"]]
+    for shape, dtype in shapes:
+        offsets.append(offset)
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        offset += -(-nbytes // _ALIGN) * _ALIGN
+    return offsets, offset
+
+
+def _arrays(buffer, spec):
+    """Header, store sum and template-matching sums as views into `buffer`."""
+    offsets, _ = _layout(spec)
+    header = np.ndarray((2,), np.int64, buffer, 0)
+    store = np.ndarray(spec["store_shape"], spec["store_dtype"], buffer, offsets[0])
+    match = [
+        np.ndarray(shape, np.float64, buffer, offset)
+        for shape, offset in zip(spec["match_shapes"], offsets[1:])
+    ]
+    return header, store, match
+
+
+class Accumulator:
+    """Sum the results of repeated runs of the sequence programmed on `pls`.
+
+    Args:
+        pls: a `Pulsed` instance with stores, templates and lookup tables set up. The
+            sequence of instructions is defined by the `program` passed to `run`, or, with
+            `add_run`, by the caller before each `pls.run`
+        match_pairs: template-matching pairs whose results are summed as well
+        shared: keep the sums in shared memory, see `spec` and `SharedView`
+
+    The accumulators are allocated on the first run, when the size of the data is known.
+    """
+
+    def __init__(self, pls, match_pairs=(), shared=False):
+        self.pls = pls
+        self.match_pairs = list(match_pairs)
+        self.shared = shared
+        self.t_arr = None
+        self._spec = None
+        self._shm = None
+        self._header = None
+        self._store = None
+        self._match = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self._shm is not None:
+            self._shm.unlink()
+
+    def _allocate(self, data, match_data):
+        spec = {
+            "name": None,
+            "store_shape": list(data.shape),
+            "store_dtype": data.dtype.str,
+            "match_shapes": [list(np.shape(m)) for m in match_data],
+        }
+        _, size = _layout(spec)
+        if self.shared:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            spec["name"] = self._shm.name
+            buffer = self._shm.buf
+        else:
+            buffer = bytearray(size)
+        self._spec = spec
+        self._header, self._store, self._match = _arrays(buffer, spec)
+        self._header[:] = 0
+        self._store[...] = 0
+        for m in self._match:
+            m[...] = 0
+
+    def add_run(self):
+        """Add the data of the last `run` of `pls` to the sums."""
+        if self._closed:
+            raise RuntimeError("the accumulator is closed")
+        self.t_arr, data = self.pls.get_store_data()
+        match_data = [self.pls.get_template_matching_data(pair) for pair in self.match_pairs]
+        if self._store is None:
+            self._allocate(data, match_data)
+
+        self._header[_SEQUENCE] += 1
+        np.add(self._store, data, out=self._store)
+        for acc, (data_i, data_q) in zip(self._match, match_data):
+            np.add(acc[0], data_i, out=acc[0])
+            np.add(acc[1], data_q, out=acc[1])
+        self._header[_COUNT] += 1
+        self._header[_SEQUENCE] += 1
+
+    def run(self, nr_runs, program, callback=None, **run_kwargs):
+        """Call `program(pls)` and `pls.run(**run_kwargs)` `nr_runs` times and sum the results.
+
+        Args:
+            nr_runs: number of runs
+            program: called with `pls` before each run to define the sequence of instructions,
+                which each run clears
+            callback: called as `callback(i, accumulator)` after the data of run `i` was added
+            **run_kwargs: passed to `pls.run`
+
+        Returns:
+            the accumulator
+        """
+        for i in range(nr_runs):
+            program(self.pls)
+            self.pls.run(**run_kwargs)
+            self.add_run()
+            if callback is not None:
+                callback(i, self)
+        return self
+
+    @property
+    def spec(self):
+        """Description of the shared buffer to pass to `SharedView` in another process."""
+        if self._shm is None:
+            raise RuntimeError("spec is only available for shared accumulators after a run")
+        return dict(self._spec)
+
+    @property
+    def count(self):
+        """Number of runs summed so far."""
+        return 0 if self._header is None else int(self._header[_COUNT])
+
+    def _check_data(self):
+        if self._closed:
+            raise RuntimeError("the accumulator is closed")
+        if self._store is None:
+            raise RuntimeError("no run has been added to the accumulator")
+
+    @property
+    def store_sum(self):
+        self._check_data()
+        return self._store
+
+    def store_mean(self):
+        """Store data averaged over all runs so far, same shape as from `get_store_data`."""
+        self._check_data()
+        return self._store / self.count
+
+    def match_mean(self, pair):
+        """Template-matching data of `pair` averaged over all runs, as a `(data_i, data_q)`."""
+        self._check_data()
+        acc = self._match[self.match_pairs.index(pair)]
+        return acc[0] / self.count, acc[1] / self.count
+
+    def close(self):
+        """Release the arrays. A shared block stays alive until unlinked, see `__exit__`."""
+        self._header = self._store = self._match = None
+        self._closed = True
+        if self._shm is not None:
+            self._shm.close()
+
+
+class SharedView:
+    """Read-only access to the sums of a shared `Accumulator`, e.g. from a worker process.
+
+    `store_sum` and `match_sums` are views of the shared memory: they are never copied, and
+    may include part of a run that is being added while they are read. Use `snapshot` for a
+    consistent copy of the averages.
+
+    On Python < 3.13 the construction briefly disables `resource_tracker.register` for the whole
+    process. Views are created one at a time under a lock, but a shared memory block that
+    another thread creates or attaches to at the same moment is not tracked.
+    """
+
+    def __init__(self, spec):
+        # do not let this process's resource tracker remove the block on exit, it belongs to
+        # the accumulator
+        if sys.version_info >= (3, 13):
+            self._shm = shared_memory.SharedMemory(name=spec["name"], track=False)
+        else:
+            # older versions always register the block. Skip that rather than unregister it
+            # afterwards: a multiprocessing child shares the tracker of its parent, where the
+            # unregistration would also drop the accumulator's own registration
+            with _REGISTER_LOCK:
+                register = resource_tracker.register
+                resource_tracker.register = lambda name, rtype: None
+                try:
+                    self._shm = shared_memory.SharedMemory(name=spec["name"])
+                finally:
+                    resource_tracker.register = register
+        self._header, self.store_sum, self.match_sums = _arrays(self._shm.buf, spec)
+        self.store_sum.flags.writeable = False
+        for m in self.match_sums:
+            m.flags.writeable = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def count(self):
+        return int(self._header[_COUNT])
+
+    def snapshot(self):
+        """Consistent averages over the runs summed so far.
+
+        Returns:
+            `(count, store_mean, match_means)`, retried until no run was being added while
+            reading
+        """
+        while True:
+            before = int(self._header[_SEQUENCE])
+            if not before % 2:
+                count = int(self._header[_COUNT])
+                store = self.store_sum / max(count, 1)
+                match = [m / max(count, 1) for m in self.match_sums]
+                if int(self._header[_SEQUENCE]) == before:
+                    return count, store, match
+            time.sleep(_RETRY_INTERVAL)
+
+    def close(self):
+        self._header = self.store_sum = self.match_sums = None
+        self._shm.close()
@@ -0,0 +1,226 @@
+"""Run the demos from the command line.
+
+    python presto_demo.py list
+    python presto_demo.py params demo_5
+    python presto_demo.py run demo_5 --address 192.168.20.4 --set nfreq=8 --set nscales=3
+    python presto_demo.py run symmetric --headless --set nr_freqs=96 --trace trace.json
+    python presto_demo.py run demo_6 --simulate
+
+A demo can be given by its module name or any unique prefix of it. The constants at the top
+of each demo are the defaults of the keyword arguments of its `measure` function; `--address`,
+`--ext-ref` and `--set NAME=VALUE` override them. Values are parsed as Python literals,
+e.g. `--set input_ports=[9,10]`, and taken as strings otherwise.
+
+With `--headless` nothing is plotted and neither matplotlib nor SciPy is imported unless the
+measurement itself needs it. `--simulate` runs against `presto_sim` instead of the hardware.
+`--profile` and `--trace` save the timing of every instrument call and of the measurement and
+plotting phases, see `presto_profile`.
+"""
+
+import argparse
+import ast
+import contextlib
+import importlib
+import inspect
+import pathlib
+
+HERE = pathlib.Path(__file__).resolve().parent
+
+
+def demos():
+    """Map of demo module names to the first line of their docstring."""
+    names = {}
+    for path in sorted(HERE.glob("*.py")):
+        if not (path.stem.startswith("demo_") or "lockin" in path.stem):
+            continue
+        # read the docstring without importing, so listing stays fast
+        doc = ast.get_docstring(ast.parse(path.read_text())) or ""
+        names[path.stem] = doc.strip().splitlines()[0] if doc.strip() else ""
+    return names
+
+
+def find_demo(name):
+    names = demos()
+    if name in names:
+        return name
+    matches = [n for n in names if n.startswith(name)]
+    if len(matches) != 1:
+        options = ", ".join(matches or names)
+        raise SystemExit(f"demo {name!r} is {'ambiguous' if matches else 'unknown'}: {options}")
+    return matches[0]
+
+
+def parse_value(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def parameters(module):
+    """Keyword arguments of the demo's `measure` function with their defaults."""
+    signature = inspect.signature(module.measure)
+    return {
+        name: p.default
+        for name, p in signature.parameters.items()
+        if p.default is not inspect.Parameter.empty and name != "callback"
+    }
+
+
+def source_parameters(name):
+    """Keyword arguments of the demo's `measure` with the source text of their defaults.
+
+    Like `demos`, the source is parsed instead of imported, so this works without presto.
+    A default that is a module constant is shown as the value assigned to it, evaluated when
+    it is a literal and as written otherwise.
+    """
+    source = (HERE / f"{name}.py").read_text()
+    tree = ast.parse(source)
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            try:
+                value = repr(ast.literal_eval(node.value))
+            except (ValueError, TypeError, SyntaxError):
+                value = ast.get_source_segment(source, node.value)
+            constants[ast.unparse(node.targets[0])] = value
+    measure = next(
+        node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == "measure"
+    )
+    args = measure.args
+    positional = args.posonlyargs + args.args
+    first = len(positional) - len(args.defaults)
+    pairs = list(zip(positional[first:], args.defaults))
+    pairs += [(a, d) for a, d in zip(args.kwonlyargs, args.kw_defaults) if d is not None]
+    return {
+        arg.arg: constants.get(ast.unparse(default), ast.get_source_segment(source, default))
+        for arg, default in pairs
+        if arg.arg != "callback"
+    }
+
+
+def build_kwargs(module, args):
+    defaults = parameters(module)
+    kwargs = {}
+    overrides = [("address", args.address), ("ext_ref", args.ext_ref)]
+    for item in args.set:
+        name, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--set expects NAME=VALUE, got {item!r}")
+        overrides.append((name.strip().lower(), parse_value(value)))
+    for name, value in overrides:
+        if value is None:
+            continue
+        if name not in defaults:
+            raise SystemExit(
+                f"{module.__name__} has no parameter {name!r}, use one of: {', '.join(defaults)}"
+            )
+        kwargs[name] = value
+    return kwargs
+
+
+def run(args):
+    if args.simulate:
+        import presto_sim
+
+        presto_sim.install()
+
+    name = find_demo(args.demo)
+    profiler = None
+    with contextlib.ExitStack() as stack:
+        if args.profile or args.trace:
+            import presto_profile
+
+            profiler = presto_profile.Profiler()
+            phase = profiler.phase
+        else:
+            phase = contextlib.nullcontext
+
+        with phase("import"):
+            module = importlib.import_module(name)
+        kwargs = build_kwargs(module, args)
+
+        if profiler is not None:
+            from presto import lockin, pulsed
+
+            for namespace, attr in (
+                (pulsed, "Pulsed"),
+                (lockin, "Lockin"),
+                (lockin, "SymmetricLockin"),
+                (module, "untwist_downconversion"),
+            ):
+                if hasattr(namespace, attr):
+                    stack.enter_context(profiler.patch(namespace, attr))
+
+        # demos with a live plot are plotted while measuring in a background thread
+        live = not args.headless and hasattr(module, "live_plot")
+        with phase("measure"):
+            if live:
+                monitor = module.live_plot(**kwargs)
+                result = monitor.run(module.measure, callback=monitor.update, **kwargs)
+            else:
+                result = module.measure(**kwargs)
+        if not args.headless and not live:
+            with phase("plot"):
+                module.plot(**result)
+
+    if profiler is not None:
+        print(profiler.report())
+        if args.profile:
+            profiler.save_json(args.profile)
+        if args.trace:
+            profiler.save_chrome_trace(args.trace)
+
+    if not args.headless:
+        import matplotlib.pyplot as plt
+
+        plt.show()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="presto_demo", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="list the available demos")
+
+    params = commands.add_parser("params", help="show the parameters of a demo")
+    params.add_argument("demo")
+
+    run_parser = commands.add_parser("run", help="run a demo")
+    run_parser.add_argument("demo")
+    run_parser.add_argument("--address", help="address/hostname of Presto")
+    run_parser.add_argument(
+        "--ext-ref",
+        action="store_const",
+        const=True,
+        help="use external 10 MHz reference",
+    )
+    run_parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="override a parameter of the demo, can be repeated",
+    )
+    run_parser.add_argument("--headless", action="store_true", help="do not plot")
+    run_parser.add_argument(
+        "--simulate", action="store_true", help="run against the simulated backend"
+    )
+    run_parser.add_argument("--profile", metavar="PATH", help="save timing as JSON to PATH")
+    run_parser.add_argument(
+        "--trace", metavar="PATH", help="save timing in Chrome trace-event format to PATH"
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        for name, doc in demos().items():
+            print(f"{name:<24} {doc}")
+    elif args.command == "params":
+        for name, default in source_parameters(find_demo(args.demo)).items():
+            print(f"{name:<16} {default}")
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Check the numbers returned by the demos against stored reference results.
+
+    python presto_golden.py check                 # all demos
+    python presto_golden.py check demo_5 symm     # demos by name or unique prefix
+    python presto_golden.py update demo_6         # store new references after a deliberate change
+
+Every demo's `measure` runs against the deterministic simulated backend in `presto_sim`, with
+the parameters in `CASES` to keep the whole check within seconds. The references in `golden/`
+are compact: for each returned array its shape, up to `MAX_SAMPLES` evenly spaced elements and
+the norm of each entry along the first axis. A demo fails when any of these differ by more
+than the tolerances, see `--rtol` and `--atol`. The check with the default tolerances is also
+part of the test suite, in `tests/test_presto_golden.py`.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import pathlib
+import sys
+import time
+
+import numpy as np
+
+import presto_sim
+from presto_demo import find_demo
+
+GOLDEN_DIR = pathlib.Path(__file__).resolve().parent / "golden"
+
+# parameters passed to `measure` of each demo
+CASES = {
+    "demo_1_simple": {},
+    "demo_2_all_templates": {},
+    "demo_3_long_pulses": {},
+    "demo_4_envelopes": {},
+    "demo_5_sweep": {},
+    "demo_6_template_match": {},
+    "lockin_demo_1": {"nr_iter": 10},
+    "symmetric_lockin_1": {"nr_freqs": 24, "nr_meas": 20},
+}
+
+MAX_SAMPLES = 2048
+RTOL = 1e-6
+ATOL = 1e-9
+
+
+def compact(result):
+    """Reduce the arrays returned by `measure` to what is stored as reference."""
+    out = {}
+    for key, value in result.items():
+        arr = np.asarray(value)
+        out[f"{key}.shape"] = np.array(arr.shape)
+        idx = np.unique(np.linspace(0, arr.size - 1, min(arr.size, MAX_SAMPLES)).astype(np.intp))
+        out[f"{key}.sample"] = arr.ravel()[idx]
+        if arr.ndim > 1:
+            out[f"{key}.norm"] = np.linalg.norm(arr.reshape(len(arr), -1), axis=1)
+    return out
+
+
+def measure(name):
+    """Run the demo `name` against the simulator and return its compact result."""
+    with presto_sim.installed():
+        module = importlib.import_module(name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = module.measure(**CASES[name])
+    return compact(result)
+
+
+def compare(reference, actual, rtol, atol):
+    """List the differences between two compact results."""
+    errors = []
+    for key in sorted(reference.keys() | actual.keys()):
+        if key not in actual:
+            errors.append(f"{key}: missing")
+            continue
+        if key not in reference:
+            errors.append(f"{key}: not in reference")
+            continue
+        ref, new = reference[key], actual[key]
+        if key.endswith(".shape") or ref.shape != new.shape:
+            if ref.shape != new.shape or not np.array_equal(ref, new):
+                errors.append(f"{key}: {ref.tolist()} != {new.tolist()}")
+            continue
+        if not np.allclose(new, ref, rtol=rtol, atol=atol):
+            deviation = np.max(np.abs(new - ref))
+            errors.append(f"{key}: max deviation {deviation:.3g}")
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("check", "update"))
+    parser.add_argument("demos", nargs="*", help="demos to run, all by default")
+    parser.add_argument("--rtol", type=float, default=RTOL, help=f"default {RTOL}")
+    parser.add_argument("--atol", type=float, default=ATOL, help=f"default {ATOL}")
+    args = parser.parse_args(argv)
+
+    names = [find_demo(name) for name in args.demos] or list(CASES)
+    failed = []
+    for name in names:
+        start = time.perf_counter()
+        actual = measure(name)
+        elapsed = time.perf_counter() - start
+        path = GOLDEN_DIR / f"{name}.npz"
+        if args.command == "update":
+            GOLDEN_DIR.mkdir(exist_ok=True)
+            np.savez_compressed(path, **actual)
+            print(f"{name:<24} updated ({elapsed:.2f} s)")
+            continue
+        if not path.exists():
+            failed.append(name)
+            print(f"{name:<24} FAIL no reference, run `update` first")
+            continue
+        with np.load(path) as f:
+            reference = dict(f)
+        errors = compare(reference, actual, args.rtol, args.atol)
+        print(f"{name:<24} {'FAIL' if errors else 'ok'} ({elapsed:.2f} s)")
+        for error in errors:
+            print(f"    {error}")
+        if errors:
+            failed.append(name)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
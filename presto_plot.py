@@ -0,0 +1,287 @@
+"""Fast plotting of many stored traces.
+
+Drawing each trace in its own `Axes`, as `plt.subplots(rows, cols)` followed by one `plot` per
+cell, costs far more than the measurement once there are more than a few dozen traces. The
+helpers here draw all traces into a single `Axes` instead:
+
+    fig, ax = plt.subplots()
+    plot_grid(ax, t_arr, data.transpose(1, 0, 2))  # rows: ports, columns: stores
+    ax.axis("off")
+
+`plot_grid` lays out a (rows, cols, samples) tensor as one `LineCollection`, reducing every
+trace to a min/max envelope of about one point pair per horizontal pixel, so that rendering
+time depends on the size of the figure rather than on the number of traces and samples.
+`plot_image` shows a (traces, samples) stack as a single image, for sweeps with thousands of
+traces.
+
+`LiveMonitor` shows points as they are measured during a sweep, redrawing with blitting at a
+limited frame rate while the acquisition runs in a separate thread.
+"""
+
+import threading
+import time
+
+import numpy as np
+from matplotlib.collections import LineCollection
+
+
+def minmax_decimate(x, y, nr_bins):
+    """Reduce traces to the minimum and maximum in each of `nr_bins` bins of samples.
+
+    Args:
+        x: sample positions, shape `(samples,)`
+        y: traces, shape `(..., samples)`
+        nr_bins: number of bins, e.g. the width in pixels the trace is drawn at
+
+    Returns:
+        `(x, y)` with `2 * nr_bins` points per trace, or the input unchanged if it is not longer
+        than that. Each bin contributes its minimum and its maximum, in the order they occur, so
+        that the drawn line covers the same pixels as the full trace.
+    """
+    nr_samples = y.shape[-1]
+    if nr_samples <= 2 * nr_bins:
+        return x, y
+    starts = np.linspace(0, nr_samples, nr_bins, endpoint=False).astype(np.intp)
+    # NaN samples are skipped, like gaps in the drawn line
+    argmin = _argreduce(np.fmin, y, starts)
+    argmax = _argreduce(np.fmax, y, starts)
+    first = np.minimum(argmin, argmax)
+    second = np.maximum(argmin, argmax)
+    idx = np.stack((first, second), axis=-1).reshape(*y.shape[:-1], 2 * nr_bins)
+    return x[idx], np.take_along_axis(y, idx, axis=-1)
+
+
+def _argreduce(ufunc, y, starts):
+    """Index of the extremum of `y` in each bin beginning at `starts`."""
+    extremum = ufunc.reduceat(y, starts, axis=-1)
+    bins = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, y.shape[-1])))
+    # first sample in each bin equal to the extremum
+    hit = y == extremum[..., bins]
+    candidates = np.where(hit, np.arange(y.shape[-1]), y.shape[-1])
+    idx = np.minimum.reduceat(candidates, starts, axis=-1)
+    # a bin of only NaN has no extremum, point at its first sample
+    return np.where(idx < y.shape[-1], idx, starts)
+
+
+def plot_grid(ax, x, traces, gap=0.1, nr_bins=None, **kwargs):
+    """Draw a grid of traces in one `Axes`, like `subplots(rows, cols, sharex, sharey)`.
+
+    Args:
+        ax: matplotlib `Axes` to draw in
+        x: sample positions shared by all traces, shape `(samples,)`
+        traces: shape `(rows, cols, samples)`, row 0 is drawn at the top
+        gap: space between cells, as a fraction of the cell size
+        nr_bins: number of min/max bins per trace. By default one per horizontal pixel of a
+            cell; `0` disables decimation.
+        **kwargs: passed to `LineCollection`, e.g. `colors` or `linewidths`
+
+    Returns:
+        the `LineCollection`
+    """
+    x = np.asarray(x, dtype=np.float64)
+    traces = np.asarray(traces)
+    rows, cols, _ = traces.shape
+
+    if nr_bins is None:
+        nr_bins = max(int(ax.bbox.width / cols), 1)
+    if nr_bins:
+        x, traces = minmax_decimate(x, traces, nr_bins)
+    x = np.broadcast_to(x, traces.shape)
+
+    # map every trace to the unit square, then offset it to its cell
+    x_min, x_max = x.min(), x.max()
+    y_min, y_max = np.nanmin(traces), np.nanmax(traces)
+    x_span = (x_max - x_min) or 1.0
+    y_span = (y_max - y_min) or 1.0
+    col_offset = (1 + gap) * np.arange(cols)[None, :, None]
+    row_offset = (1 + gap) * np.arange(rows - 1, -1, -1)[:, None, None]
+    xs = (x - x_min) / x_span + col_offset
+    ys = (traces - y_min) / y_span + row_offset
+
+    segments = np.stack((xs, ys), axis=-1).reshape(rows * cols, -1, 2)
+    kwargs.setdefault("linewidths", 0.8)
+    collection = LineCollection(segments, **kwargs)
+    ax.add_collection(collection)
+    ax.set_xlim(-gap / 2, cols * (1 + gap) - gap / 2)
+    ax.set_ylim(-gap / 2, rows * (1 + gap) - gap / 2)
+    return collection
+
+
+def plot_image(ax, x, traces, **kwargs):
+    """Draw a stack of traces as an image, one row of pixels per trace.
+
+    Args:
+        ax: matplotlib `Axes` to draw in
+        x: sample positions shared by all traces, shape `(samples,)`
+        traces: shape `(nr_traces, samples)`, trace 0 is drawn at the top
+        **kwargs: passed to `imshow`, e.g. `cmap` or `vmin`/`vmax`
+
+    Returns:
+        the `AxesImage`
+    """
+    kwargs.setdefault("aspect", "auto")
+    kwargs.setdefault("interpolation", "antialiased")
+    return ax.imshow(
+        traces,
+        extent=(x[0], x[-1], len(traces) - 0.5, -0.5),
+        **kwargs,
+    )
+
+
+class LiveMonitor:
+    """Live plot of a sweep that arrives in chunks of points.
+
+    The points are kept in preallocated arrays drawn by a single animated artist. Redraws
+    only repaint that artist on top of a cached background (blitting) and happen at most `fps`
+    times per second; a full redraw is done only when new points fall outside the axis limits.
+    Limits known in advance can be fixed with `xlim` and `ylim`. Otherwise the exceeded side of
+    the limits grows by the whole span, so a sweep needs only O(log n) full redraws.
+
+    Storing data (`update`) is separate from drawing (`draw`), so the acquisition can run in a
+    worker thread while the main thread keeps the figure responsive:
+
+        monitor = LiveMonitor(ax, marker=".", color="b")
+        result = monitor.run(measure, callback=monitor.update)
+
+    A monitor can also be passed directly as the callback, in which case each chunk is stored
+    and drawn from the acquisition loop, but never faster than the frame rate.
+    """
+
+    def __init__(self, ax, capacity=1024, fps=10.0, margin=0.05, xlim=None, ylim=None, **kwargs):
+        """
+        Args:
+            ax: matplotlib `Axes` to draw in
+            capacity: number of points to preallocate, grown as needed
+            fps: maximum number of redraws per second
+            margin: headroom added around the first data drawn, as a fraction of its range
+            xlim: fixed `(left, right)` limits of the x axis, never changed when given
+            ylim: fixed `(bottom, top)` limits of the y axis, never changed when given
+            **kwargs: passed to `Axes.plot`, `linestyle` defaults to "none"
+        """
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.margin = margin
+        self._fixed = (xlim is not None, ylim is not None)
+        if xlim is not None:
+            ax.set_xlim(xlim)
+        if ylim is not None:
+            ax.set_ylim(ylim)
+        self._interval = 1.0 / fps
+        self._x = np.full(capacity, np.nan)
+        self._y = np.full(capacity, np.nan)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._scaled = False
+        self._last_draw = -np.inf
+        self._background = None
+
+        kwargs.setdefault("linestyle", "none")
+        (self._line,) = ax.plot([], [], animated=True, **kwargs)
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        self._background = self.canvas.copy_from_bbox(self.ax.figure.bbox)
+        self.ax.draw_artist(self._line)
+
+    def update(self, index, x, y):
+        """Store chunk number `index` of `x` and `y` values, all chunks having the same length.
+
+        Only copies the data, it is safe to call from any thread.
+        """
+        x = np.ravel(x)
+        y = np.ravel(y)
+        start = index * len(x)
+        stop = start + len(x)
+        with self._lock:
+            if stop > len(self._x):
+                size = max(stop, 2 * len(self._x))
+                self._x = np.append(self._x, np.full(size - len(self._x), np.nan))
+                self._y = np.append(self._y, np.full(size - len(self._y), np.nan))
+            self._x[start:stop] = x
+            self._y[start:stop] = y
+            self._dirty = True
+
+    def __call__(self, index, x, y):
+        self.update(index, x, y)
+        self.draw()
+
+    def _limits(self, data, current, fixed):
+        """New axis limits covering `data`, or `None` to keep the `current` ones."""
+        if fixed:
+            return None
+        lo, hi = np.nanmin(data), np.nanmax(data)
+        if not self._scaled:
+            pad = self.margin * ((hi - lo) or abs(hi) or 1.0)
+            return lo - pad, hi + pad
+        if current[0] <= lo and hi <= current[1]:
+            return None
+        # extend the exceeded side by the whole span, doubling it
+        lo, hi = min(lo, current[0]), max(hi, current[1])
+        span = hi - lo
+        return lo - span * (lo < current[0]), hi + span * (hi > current[1])
+
+    def draw(self, force=False):
+        """Redraw if there is new data and the last redraw is older than 1 / fps.
+
+        Returns:
+            `True` if the figure was redrawn
+        """
+        now = time.perf_counter()
+        if not self._dirty or (not force and now - self._last_draw < self._interval):
+            return False
+        with self._lock:
+            x = self._x.copy()
+            y = self._y.copy()
+            self._dirty = False
+        self._last_draw = now
+        if np.isnan(x).all():
+            return False
+
+        self._line.set_data(x, y)
+        xlim = self._limits(x, self.ax.get_xlim(), self._fixed[0])
+        ylim = self._limits(y, self.ax.get_ylim(), self._fixed[1])
+        if xlim is not None or ylim is not None:
+            # new points outside the current view: one full redraw with new limits
+            if xlim is not None:
+                self.ax.set_xlim(xlim)
+            if ylim is not None:
+                self.ax.set_ylim(ylim)
+            self._scaled = True
+            self.canvas.draw()
+        elif self._background is None or not self.canvas.supports_blit:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self.ax.draw_artist(self._line)
+            self.canvas.blit(self.ax.figure.bbox)
+        self.canvas.flush_events()
+        return True
+
+    def run(self, func, *args, **kwargs):
+        """Call `func(*args, **kwargs)` in a worker thread, redrawing until it returns.
+
+        Pass `callback=monitor.update` (or however `func` takes its progress callback) to
+        feed the monitor.
+
+        Returns:
+            the return value of `func`, any exception raised by it is re-raised here
+        """
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = func(*args, **kwargs)
+            except BaseException as exc:
+                outcome["error"] = exc
+
+        worker = threading.Thread(target=target, daemon=True)
+        worker.start()
+        while worker.is_alive():
+            self.draw()
+            # process GUI events while waiting for the next frame
+            self.canvas.start_event_loop(self._interval)
+        worker.join()
+        self.draw(force=True)
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
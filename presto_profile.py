@@ -0,0 +1,348 @@
+"""Per-phase timing of demo runs.
+
+Wrap a `Pulsed` or `Lockin` instance to record the duration of every method call and the
+number of bytes moved by it, time host-side phases (template synthesis, analysis, plotting)
+with `Profiler.phase`, and export everything as JSON or in Chrome trace-event format.
+Trace files can be opened in chrome://tracing or https://ui.perfetto.dev
+
+Example:
+
+    prof = Profiler()
+    with prof.instrument(pulsed.Pulsed(address=ADDRESS)) as pls:
+        with prof.phase("synthesis"):
+            data = np.sin(2 * np.pi * freq * t) * np.hanning(N)
+        template_1 = pls.setup_template(OUTPUT_PORT, group=0, template=data)
+        ...
+        pls.run(period=10e-6, repeat_count=1, num_averages=1)
+        t_arr, data = pls.get_store_data()
+    with prof.phase("plot"):
+        ...
+    print(prof.report())
+    prof.save_chrome_trace("trace.json")
+
+Instead of wrapping an instance by hand, `Profiler.patch` can temporarily replace a class or
+function in a module, e.g. `pulsed.Pulsed` or `untwist_downconversion`, so that unmodified
+demo code is profiled too.
+"""
+
+import contextlib
+import json
+import numbers
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+# attributes of an instrument that are themselves instrumented, e.g. `lck.hardware.sleep`
+NESTED_ATTRIBUTES = ("hardware",)
+
+# methods whose return value is instrumented too, e.g. the input group from
+# `lck.add_input_group`, so that its `set_frequencies` calls are recorded. Templates are not
+# wrapped, since they are passed back to the instrument as they are.
+NESTED_RESULTS = ("add_",)
+
+# method-name prefixes mapped to trace categories, first match wins
+CATEGORIES = (
+    ("setup_", "upload"),
+    ("add_", "upload"),
+    ("set_", "upload"),
+    ("configure_", "upload"),
+    ("tune", "upload"),
+    ("get_fs", "query"),
+    ("get_df", "query"),
+    ("get_", "download"),
+    ("run", "run"),
+    ("apply_settings", "run"),
+    ("sleep", "sleep"),
+    ("output_pulse", "sequence"),
+    ("store", "sequence"),
+    ("match", "sequence"),
+    ("select_", "sequence"),
+    ("next_", "sequence"),
+    ("reset_", "sequence"),
+)
+
+
+@dataclass
+class Event:
+    """One timed call or phase."""
+
+    name: str
+    category: str
+    start: float  # seconds since the profiler was created
+    duration: float  # seconds
+    bytes_in: int  # bytes passed as NumPy arrays to the call (host -> instrument)
+    bytes_out: int  # bytes returned as NumPy arrays by the call (instrument -> host)
+    thread: int
+
+
+def _category(name):
+    for prefix, category in CATEGORIES:
+        if name.startswith(prefix):
+            return category
+    return "call"
+
+
+def _nbytes(obj):
+    """Total size of all NumPy arrays in `obj`, looking inside tuples, lists and dicts."""
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(obj, (tuple, list)):
+        return sum(_nbytes(o) for o in obj)
+    if isinstance(obj, dict):
+        return sum(_nbytes(o) for o in obj.values())
+    return 0
+
+
+def _has_methods(obj):
+    """Whether `obj` is an object whose method calls are worth timing, e.g. an input group.
+
+    `None`, numbers, strings, containers and arrays are returned as they are.
+    """
+    if obj is None or hasattr(obj, "__array__"):
+        return False
+    if isinstance(obj, (numbers.Number, str, bytes, tuple, list, dict)):
+        return False
+    return any(callable(getattr(obj, a, None)) for a in dir(obj) if not a.startswith("_"))
+
+
+def _unwrap(obj):
+    return obj._target if isinstance(obj, _Instrumented) else obj
+
+
+class _Instrumented:
+    """Proxy that times every method call on `target`."""
+
+    def __init__(self, profiler, target, prefix=""):
+        self._profiler = profiler
+        self._target = target
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name in NESTED_ATTRIBUTES:
+            return _Instrumented(self._profiler, attr, f"{self._prefix}{name}.")
+        if not callable(attr):
+            return attr
+        timed = self._profiler.wrap(attr, self._prefix + name, _category(name))
+
+        def method(*args, **kwargs):
+            args = [_unwrap(a) for a in args]
+            kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+            result = timed(*args, **kwargs)
+            if result is self._target:
+                # keep chained calls like `sg.set_frequencies(f).set_amplitudes(a)` timed
+                return self
+            if name.startswith(NESTED_RESULTS) and _has_methods(result):
+                # e.g. `add_input_group` -> `input_group.set_frequencies`
+                return _Instrumented(self._profiler, result, f"{self._prefix}{name[4:]}.")
+            return result
+
+        return method
+
+    def __enter__(self):
+        self._target.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        name = self._prefix + "close"
+        return self._profiler.call(name, "close", self._target.__exit__, *exc_info)
+
+
+class Profiler:
+    """Collect timed events and export them.
+
+    Events can be recorded from several threads. All times are relative to the creation of the
+    profiler.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._threads = {}
+
+    def _add(self, name, category, start, bytes_in, bytes_out):
+        stop = time.perf_counter()
+        with self._lock:
+            thread = self._threads.setdefault(threading.get_ident(), len(self._threads))
+            self.events.append(
+                Event(name, category, start - self._t0, stop - start, bytes_in, bytes_out, thread)
+            )
+
+    def call(self, name, category, func, *args, **kwargs):
+        """Call `func(*args, **kwargs)` and record it as one event."""
+        bytes_in = _nbytes(args) + _nbytes(kwargs)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            self._add(name, category, start, bytes_in, 0)
+            raise
+        self._add(name, category, start, bytes_in, _nbytes(result))
+        return result
+
+    def wrap(self, func, name=None, category="host"):
+        """Return a version of `func` that records an event on every call."""
+        if name is None:
+            name = func.__name__
+
+        def wrapper(*args, **kwargs):
+            return self.call(name, category, func, *args, **kwargs)
+
+        wrapper.__name__ = getattr(func, "__name__", name)
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+
+    def instrument(self, instrument):
+        """Return a proxy to `instrument` (e.g. `Pulsed` or `Lockin`) that times all calls.
+
+        The proxy can be used as a context manager in place of the original.
+        """
+        return _Instrumented(self, instrument)
+
+    @contextlib.contextmanager
+    def phase(self, name, category="host"):
+        """Record the time spent inside a `with` block as one event."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, category, start, 0, 0)
+
+    @contextlib.contextmanager
+    def patch(self, namespace, name):
+        """Temporarily replace `namespace.name` with a profiled version.
+
+        A class is replaced by a subclass whose construction returns an instrumented instance,
+        with the construction (i.e. connecting to the instrument) recorded as `connect`. Class
+        attributes such as `pulsed.Pulsed.FS_DAC` and `isinstance` checks against it keep
+        working. Any other callable is replaced with `wrap`.
+        """
+        original = getattr(namespace, name)
+        if isinstance(original, type):
+            profiler = self
+
+            def __new__(cls, *args, **kwargs):
+                instance = profiler.call(name, "connect", original, *args, **kwargs)
+                return profiler.instrument(instance)
+
+            replacement = type(
+                original.__name__,
+                (original,),
+                {
+                    "__new__": __new__,
+                    "__module__": original.__module__,
+                    "__qualname__": original.__qualname__,
+                    "__doc__": original.__doc__,
+                },
+            )
+
+        else:
+            replacement = self.wrap(original, name)
+        setattr(namespace, name, replacement)
+        try:
+            yield
+        finally:
+            setattr(namespace, name, original)
+
+    def self_times(self):
+        """Duration of each event minus the events nested directly inside it.
+
+        For a phase such as `measure` this is the time spent in host code between instrument
+        calls, e.g. template synthesis and analysis.
+        """
+        self_times = [ev.duration for ev in self.events]
+        order = sorted(
+            range(len(self.events)),
+            key=lambda i: (self.events[i].thread, self.events[i].start, -self.events[i].duration),
+        )
+        stack = []
+        for i in order:
+            ev = self.events[i]
+            while stack and (
+                self.events[stack[-1]].thread != ev.thread
+                or self.events[stack[-1]].start + self.events[stack[-1]].duration <= ev.start
+            ):
+                stack.pop()
+            if stack:
+                self_times[stack[-1]] -= ev.duration
+            stack.append(i)
+        return self_times
+
+    def summary(self):
+        """Aggregate events by name.
+
+        Returns:
+            dict mapping each event name to a dict with `category`, `count`, `total` time in
+            seconds, `self` time excluding nested events (see `self_times`), `bytes_in` and
+            `bytes_out`, sorted by decreasing total time.
+        """
+        summary = {}
+        for ev, self_time in zip(self.events, self.self_times()):
+            entry = summary.setdefault(
+                ev.name,
+                {
+                    "category": ev.category,
+                    "count": 0,
+                    "total": 0.0,
+                    "self": 0.0,
+                    "bytes_in": 0,
+                    "bytes_out": 0,
+                },
+            )
+            entry["count"] += 1
+            entry["total"] += ev.duration
+            entry["self"] += self_time
+            entry["bytes_in"] += ev.bytes_in
+            entry["bytes_out"] += ev.bytes_out
+        return dict(sorted(summary.items(), key=lambda item: -item[1]["total"]))
+
+    def report(self):
+        """Human-readable table of `summary`."""
+        lines = [
+            f"{'name':<32} {'category':<9} {'count':>6} {'total [s]':>10} {'self [s]':>10}"
+            f" {'kB in':>10} {'kB out':>10}"
+        ]
+        for name, entry in self.summary().items():
+            lines.append(
+                f"{name:<32} {entry['category']:<9} {entry['count']:>6} {entry['total']:>10.4f}"
+                f" {entry['self']:>10.4f} {entry['bytes_in'] / 1e3:>10.1f}"
+                f" {entry['bytes_out'] / 1e3:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "events": [asdict(ev) for ev in self.events],
+            "summary": self.summary(),
+        }
+
+    def chrome_trace(self):
+        """Events in Chrome trace-event format, as complete ("X") events in microseconds."""
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": ev.name,
+                    "cat": ev.category,
+                    "ph": "X",
+                    "ts": 1e6 * ev.start,
+                    "dur": 1e6 * ev.duration,
+                    "pid": pid,
+                    "tid": ev.thread,
+                    "args": {"bytes_in": ev.bytes_in, "bytes_out": ev.bytes_out},
+                }
+                for ev in self.events
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def save_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def save_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
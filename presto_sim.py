@@ -0,0 +1,613 @@
+"""Simulated Presto backend for running the demos without hardware.
+
+Implements the subset of the `presto.pulsed`, `presto.lockin`, `presto.hardware` and
+`presto.utils` API used by the demos, with every output port looped back to the input port
+with the same number. Noise is drawn from a seeded generator, so repeated runs with the same
+settings return identical data.
+
+Use the submodules directly:
+
+    from presto_sim import pulsed
+
+    with pulsed.Pulsed(address="sim") as pls:
+        ...
+
+or make `import presto` resolve to the simulator, so that the unmodified demos run against
+it:
+
+    import presto_sim
+    presto_sim.install()
+    import demo_1_simple
+    demo_1_simple.measure()
+
+The simulation is meant for exercising the host-side code paths and for regression checks; it
+does not model converter nonlinearities, latencies or the sequencer's resource limits.
+"""
+
+import contextlib
+import enum
+import sys
+import types
+
+import numpy as np
+
+MAX_TEMPLATE_LEN = 4088
+MAX_LUT_ENTRIES = 512
+
+DEFAULT_SEED = 0
+NOISE_RMS = 1e-4  # full-scale units, per sample or per lock-in pixel
+
+
+class AdcMode(enum.Enum):
+    Direct = "direct"
+    Mixed = "mixed"
+
+
+class DacMode(enum.Enum):
+    Direct = "direct"
+    Mixed = "mixed"
+
+
+def _as_list(x):
+    if isinstance(x, (int, np.integer)):
+        return [int(x)]
+    return list(x)
+
+
+def untwist_downconversion(I_port, Q_port):
+    """Split I/Q lock-in data from a mixed-mode input into lower and upper sidebands."""
+    lsb = 0.5 * (I_port + 1j * Q_port)
+    hsb = 0.5 * (np.conj(I_port) + 1j * np.conj(Q_port))
+    return lsb, hsb
+
+
+class _Hardware:
+    """Stand-in for `presto.hardware.Hardware`: records settings, never waits."""
+
+    def __init__(self):
+        self.mixer = {}
+        self.adc_attenuation = {}
+        self.dac_current = {}
+
+    def configure_mixer(self, freq, in_ports=None, out_ports=None, **kwargs):
+        for port in _as_list(in_ports or []) + _as_list(out_ports or []):
+            self.mixer[port] = freq
+
+    def set_adc_attenuation(self, ports, value):
+        for port in _as_list(ports):
+            self.adc_attenuation[port] = value
+
+    def set_dac_current(self, ports, current):
+        for port in _as_list(ports):
+            self.dac_current[port] = current
+
+    def sleep(self, duration, verbose=True):
+        pass
+
+
+class _Instrument:
+    def __init__(
+        self,
+        address=None,
+        ext_ref_clk=False,
+        adc_mode=AdcMode.Direct,
+        dac_mode=DacMode.Direct,
+        seed=DEFAULT_SEED,
+        **kwargs,
+    ):
+        self.address = address
+        self.ext_ref_clk = ext_ref_clk
+        self.adc_mode = adc_mode
+        self.dac_mode = dac_mode
+        self.hardware = _Hardware()
+        self._rng = np.random.default_rng(seed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        pass
+
+
+# ******************
+# *** Pulsed API ***
+# ******************
+
+
+class Template:
+    """Output template; templates longer than `MAX_TEMPLATE_LEN` are kept in one piece."""
+
+    def __init__(self, port, group, data, envelope):
+        self.port = port
+        self.group = group
+        self.data = np.asarray(data, dtype=np.float64)
+        self.envelope = envelope
+
+    @property
+    def nr_segments(self):
+        return -(-len(self.data) // MAX_TEMPLATE_LEN)
+
+
+class TemplateMatchingPair:
+    def __init__(self, input_port, template1, template2):
+        self.input_port = input_port
+        self.template1 = np.asarray(template1, dtype=np.float64)
+        self.template2 = np.asarray(template2, dtype=np.float64)
+
+
+class _Lut:
+    def __init__(self, values, axis):
+        self.values = values
+        self.axis = axis
+
+
+class Pulsed(_Instrument):
+    """Simulated `presto.pulsed.Pulsed` with all outputs looped back to inputs."""
+
+    FS_DAC = 6e9
+    FS_ADC = 3e9
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._store_ports = []
+        self._store_len = 0
+        self._freq_luts = {}
+        self._scale_luts = {}
+        self._events = []
+        self._store_data = None
+        self._t_arr = None
+        self._match_data = {}
+
+    def get_fs(self, which):
+        if which == "dac":
+            return self.FS_DAC
+        if which == "adc":
+            return self.FS_ADC
+        raise ValueError(f"unknown converter {which!r}, use 'adc' or 'dac'")
+
+    # *** setup ***
+
+    def setup_store(self, input_ports, duration):
+        self._store_ports = _as_list(input_ports)
+        self._store_len = int(round(duration * self.FS_ADC))
+
+    def setup_template(self, output_port, group, template, template_q=None, envelope=False):
+        return Template(output_port, group, template, envelope)
+
+    def setup_long_drive(
+        self,
+        output_port,
+        group,
+        duration,
+        amplitude=1.0,
+        amplitude_q=None,
+        rise_time=0.0,
+        fall_time=0.0,
+        envelope=True,
+    ):
+        n = int(round(duration * self.FS_DAC))
+        data = np.full(n, float(amplitude))
+        n_rise = min(int(round(rise_time * self.FS_DAC)), n)
+        n_fall = min(int(round(fall_time * self.FS_DAC)), n)
+        if n_rise:
+            data[:n_rise] *= np.sin(0.5 * np.pi * np.arange(n_rise) / n_rise) ** 2
+        if n_fall:
+            data[-n_fall:] *= np.cos(0.5 * np.pi * np.arange(n_fall) / n_fall) ** 2
+        return Template(output_port, group, data, envelope)
+
+    def setup_scale_lut(self, output_ports, group, scales, axis=-1):
+        lut = _Lut(np.atleast_1d(np.asarray(scales, dtype=np.float64)), axis)
+        for port in _as_list(output_ports):
+            self._scale_luts[(port, group)] = lut
+
+    def setup_freq_lut(self, output_ports, group, frequencies, phases, phases_q=None, axis=-1):
+        values = np.stack(
+            np.broadcast_arrays(
+                np.atleast_1d(np.asarray(frequencies, dtype=np.float64)),
+                np.atleast_1d(np.asarray(phases, dtype=np.float64)),
+            ),
+            axis=-1,
+        )
+        lut = _Lut(values, axis)
+        for port in _as_list(output_ports):
+            self._freq_luts[(port, group)] = lut
+
+    def setup_template_matching_pair(self, input_port, template1, template2=None, **kwargs):
+        if template2 is None:
+            template2 = np.zeros_like(template1)
+        return TemplateMatchingPair(input_port, template1, template2)
+
+    # *** sequence ***
+
+    def output_pulse(self, at_time, templates):
+        if isinstance(templates, Template):
+            templates = [templates]
+        for template in templates:
+            self._events.append((at_time, "pulse", template))
+
+    def store(self, at_time):
+        self._events.append((at_time, "store", None))
+
+    def match(self, at_time, pairs):
+        if isinstance(pairs, TemplateMatchingPair):
+            pairs = [pairs]
+        for pair in pairs:
+            self._events.append((at_time, "match", pair))
+
+    def reset_phase(self, at_time, output_ports, group=None):
+        self._events.append((at_time, "reset_phase", (_as_list(output_ports), group)))
+
+    def select_frequency(self, at_time, index, output_ports, group=None):
+        self._events.append((at_time, "select_frequency", (_as_list(output_ports), group, index)))
+
+    def select_scale(self, at_time, index, output_ports, group=None):
+        self._events.append((at_time, "select_scale", (_as_list(output_ports), group, index)))
+
+    def next_frequency(self, at_time, output_ports, group=None):
+        self._events.append((at_time, "next_frequency", (_as_list(output_ports), group)))
+
+    def next_scale(self, at_time, output_ports, group=None):
+        self._events.append((at_time, "next_scale", (_as_list(output_ports), group)))
+
+    # *** run ***
+
+    def _step(self, index, keys, group, luts, counter, shape, step):
+        """Advance (or set) the LUT index of `keys`, honouring the LUT's loop axis."""
+        for port in keys:
+            for (p, g), lut in luts.items():
+                if p != port or (group is not None and g != group):
+                    continue
+                if index is not None:
+                    counter[(p, g)] = index
+                    continue
+                # with a multidimensional repeat_count, a LUT on axis `k` only advances when
+                # all the inner loops wrap around
+                tail = lut.axis % len(shape) + 1
+                inner = int(np.prod(shape[tail:]))
+                if (step + 1) % inner == 0:
+                    counter[(p, g)] = counter.get((p, g), 0) + 1
+
+    def _pulse_samples(self, t, at_time, template, freq_idx, scale_idx, phase_ref):
+        """Contribution of `template` played at `at_time` to input samples at times `t`."""
+        k = np.rint((t - at_time) * self.FS_DAC).astype(np.int64)
+        mask = (k >= 0) & (k < len(template.data))
+        out = np.zeros_like(t)
+        if not mask.any():
+            return out
+        key = (template.port, template.group)
+        scale_lut = self._scale_luts.get(key)
+        scale = 1.0
+        if scale_lut is not None:
+            scale = scale_lut.values[scale_idx.get(key, 0) % len(scale_lut.values)]
+        values = scale * template.data[k[mask]]
+        if template.envelope:
+            freq_lut = self._freq_luts.get(key)
+            if freq_lut is not None:
+                freq, phase = freq_lut.values[freq_idx.get(key, 0) % len(freq_lut.values)]
+                ref = phase_ref.get(template.port, 0.0)
+                values = values * np.cos(2 * np.pi * freq * (t[mask] - ref) + phase)
+        out[mask] = values
+        return out
+
+    def _input(self, port, t, period_start, pulses):
+        sig = np.zeros_like(t)
+        for at_time, template, freq_idx, scale_idx, phase_ref in pulses:
+            start = period_start + at_time
+            stop = start + len(template.data) / self.FS_DAC
+            if template.port != port or start > t[-1] or stop < t[0]:
+                continue
+            sig += self._pulse_samples(t, start, template, freq_idx, scale_idx, phase_ref)
+        return sig
+
+    def run(self, period, repeat_count, num_averages, print_time=True, verbose=True):
+        shape = tuple(_as_list(repeat_count)) if np.iterable(repeat_count) else (repeat_count,)
+        nr_repeats = int(np.prod(shape))
+        events = sorted(self._events, key=lambda ev: ev[0])
+        nr_stores = sum(kind == "store" for _, kind, _ in events)
+        noise_rms = NOISE_RMS / np.sqrt(num_averages)
+
+        store_data = np.zeros((nr_stores * nr_repeats, len(self._store_ports), self._store_len))
+        match_data = {}
+        t_store = np.arange(self._store_len) / self.FS_ADC
+        freq_idx = {}
+        scale_idx = {}
+        phase_ref = {}
+        store_idx = 0
+        for step in range(nr_repeats):
+            period_start = step * period
+            pulses = []
+            for at_time, kind, arg in events:
+                now = period_start + at_time
+                if kind == "pulse":
+                    pulses.append((at_time, arg, dict(freq_idx), dict(scale_idx), dict(phase_ref)))
+                elif kind == "reset_phase":
+                    for port in arg[0]:
+                        phase_ref[port] = now
+                elif kind in ("next_frequency", "select_frequency"):
+                    index = arg[2] if kind == "select_frequency" else None
+                    self._step(index, arg[0], arg[1], self._freq_luts, freq_idx, shape, step)
+                elif kind in ("next_scale", "select_scale"):
+                    index = arg[2] if kind == "select_scale" else None
+                    self._step(index, arg[0], arg[1], self._scale_luts, scale_idx, shape, step)
+            for at_time, kind, arg in events:
+                if kind == "store":
+                    t = period_start + at_time + t_store
+                    for i, port in enumerate(self._store_ports):
+                        store_data[store_idx, i] = self._input(port, t, period_start, pulses)
+                    store_idx += 1
+                elif kind == "match":
+                    t = period_start + at_time + np.arange(len(arg.template1)) / self.FS_ADC
+                    sig = self._input(arg.input_port, t, period_start, pulses)
+                    sig += noise_rms * self._rng.standard_normal(len(sig))
+                    match_data.setdefault(id(arg), []).append(
+                        (np.dot(sig, arg.template1), np.dot(sig, arg.template2))
+                    )
+        store_data += noise_rms * self._rng.standard_normal(store_data.shape)
+
+        self._t_arr = t_store
+        self._store_data = store_data
+        self._match_data = {key: np.array(value).T for key, value in match_data.items()}
+        self._events = []
+
+    def get_store_data(self):
+        return self._t_arr, self._store_data
+
+    def get_template_matching_data(self, pairs):
+        if isinstance(pairs, TemplateMatchingPair):
+            return tuple(self._match_data[id(pairs)])
+        return tuple(tuple(self._match_data[id(pair)]) for pair in pairs)
+
+
+# ******************
+# *** Lockin API ***
+# ******************
+
+
+class _Group:
+    def __init__(self, nr_freq):
+        self.nr_freq = nr_freq
+        self.frequencies = np.zeros(nr_freq)
+        self.amplitudes = np.zeros(nr_freq)
+        self.phases = np.zeros(nr_freq)
+
+    def set_frequencies(self, freqs):
+        self.frequencies = np.broadcast_to(np.asarray(freqs, dtype=np.float64), self.nr_freq)
+        return self
+
+    def set_amplitudes(self, amps):
+        self.amplitudes = np.broadcast_to(np.asarray(amps, dtype=np.float64), self.nr_freq)
+        return self
+
+    def set_phases(self, phases, phases_q=None):
+        self.phases = np.broadcast_to(np.asarray(phases, dtype=np.float64), self.nr_freq)
+        return self
+
+
+class OutputGroup(_Group):
+    def __init__(self, ports, nr_freq):
+        super().__init__(nr_freq)
+        self.ports = _as_list(ports)
+
+
+class InputGroup(_Group):
+    def __init__(self, port, nr_freq):
+        super().__init__(nr_freq)
+        self.port = port
+
+
+class SymmetricGroup(_Group):
+    def __init__(self, input_port, output_ports, nr_freq):
+        super().__init__(nr_freq)
+        self.input_port = input_port
+        self.ports = _as_list(output_ports)
+
+
+class Lockin(_Instrument):
+    """Simulated `presto.lockin.Lockin`.
+
+    A tone at detuning `delta` from a measured frequency shows up with amplitude
+    `sinc(delta / df)`, rotating at `delta` from pixel to pixel.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._df = 1e6
+        self._output_groups = []
+        self._input_groups = []
+        self._applied = ([], [])
+        self._pixel_count = 0
+
+    def tune(self, f, df):
+        return np.round(np.asarray(f) / df) * df, df
+
+    def set_df(self, df):
+        self._df = df
+
+    def get_df(self):
+        return self._df
+
+    def set_phase_reset(self, state):
+        pass
+
+    def set_dither(self, state, output_ports):
+        pass
+
+    def set_trigger_out(self, port, delay=0.0, width=0.0):
+        pass
+
+    def add_output_group(self, ports, nr_freq):
+        group = OutputGroup(ports, nr_freq)
+        self._output_groups.append(group)
+        return group
+
+    def add_input_group(self, port, nr_freq):
+        group = InputGroup(port, nr_freq)
+        self._input_groups.append(group)
+        return group
+
+    def apply_settings(self):
+        def snapshot(group):
+            copy = _Group.__new__(type(group))
+            copy.__dict__.update(group.__dict__)
+            return copy
+
+        self._applied = (
+            [snapshot(g) for g in self._output_groups],
+            [snapshot(g) for g in self._input_groups],
+        )
+
+    def _acquire(self, port, freqs, n, fir_coeffs):
+        """Complex lock-in pixels, shape `(n, len(freqs))`, measured at `freqs` on `port`."""
+        t = (self._pixel_count + np.arange(n))[:, None] / self._df
+        data = np.zeros((n, len(freqs)), np.complex128)
+        constant = np.zeros(len(freqs), np.complex128)
+        for group in self._applied[0]:
+            if port not in group.ports:
+                continue
+            delta = group.frequencies[:, None] - freqs[None, :]
+            weight = (
+                group.amplitudes[:, None]
+                * np.sinc(delta / self._df)
+                * np.exp(1j * group.phases[:, None])
+            )
+            # only (tone, frequency) pairs that are not vanishingly small, e.g. tuned tones
+            # do not leak into the other bins
+            col, tone = np.nonzero(np.abs(weight.T) > 1e-3 * NOISE_RMS)
+            if not len(col):
+                continue
+            tuned = delta[tone, col] == 0.0
+            # a tone exactly on the frequency is a constant, np.add.at sums repeated bins
+            np.add.at(constant, col[tuned], weight[tone[tuned], col[tuned]])
+            tone, col = tone[~tuned], col[~tuned]
+            if not len(col):
+                continue
+            rotation = np.exp(2j * np.pi * delta[tone, col] * t) * weight[tone, col]
+            # pairs are sorted by frequency bin, sum the tones falling in each bin
+            cols, starts = np.unique(col, return_index=True)
+            data[:, cols] += np.add.reduceat(rotation, starts, axis=1)
+        data += constant
+        data += NOISE_RMS * (
+            self._rng.standard_normal(data.shape) + 1j * self._rng.standard_normal(data.shape)
+        )
+        if fir_coeffs is not None:
+            # causal FIR filter as a convolution by FFT, keeping the first n samples; the
+            # transforms run over contiguous rows of the transposed data
+            nfft = 1 << (n + len(fir_coeffs) - 2).bit_length()
+            spectrum = np.fft.fft(np.ascontiguousarray(data.T), nfft) * np.fft.fft(
+                fir_coeffs, nfft
+            )
+            data = np.ascontiguousarray(np.fft.ifft(spectrum)[:, :n].T)
+        self._pixel_count += n
+        return data
+
+    def get_pixels(self, n, summed=False, nsum=None, fir_coeffs=None):
+        pixels = {}
+        for group in self._applied[1]:
+            data = self._acquire(group.port, group.frequencies, n, fir_coeffs)
+            # mixed-mode I and Q ports, so that `untwist_downconversion` returns the signal
+            # in the upper sideband
+            pixel_i = np.conj(data)
+            pixel_q = 1j * np.conj(data)
+            pixels[group.port] = (np.array(group.frequencies), pixel_i, pixel_q)
+        return pixels
+
+
+class SymmetricLockin(Lockin):
+    """Simulated `presto.lockin.SymmetricLockin`."""
+
+    def add_symmetric_group(self, input_port, output_ports, nr_freq):
+        group = SymmetricGroup(input_port, output_ports, nr_freq)
+        self._output_groups.append(group)
+        return group
+
+    def apply_settings(self):
+        self._input_groups = [g for g in self._output_groups if isinstance(g, SymmetricGroup)]
+        super().apply_settings()
+
+    def get_pixels(self, n, summed=False, nsum=None, fir_coeffs=None):
+        pixels = {}
+        for group in self._applied[1]:
+            freqs = np.array(group.frequencies)
+            port = group.input_port
+            if not summed:
+                pixels[port] = (freqs, self._acquire(port, freqs, n, fir_coeffs))
+                continue
+            data = self._acquire(port, freqs, n * nsum, fir_coeffs)
+            data = data.reshape(n, nsum, len(freqs))
+            mean = data.mean(axis=1)
+            std = data.real.std(axis=1) + 1j * data.imag.std(axis=1)
+            pixels[port] = (freqs, mean, std)
+        return pixels
+
+
+# ******************************
+# *** module-level namespace ***
+# ******************************
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+hardware = _module("presto.hardware", AdcMode=AdcMode, DacMode=DacMode)
+utils = _module("presto.utils", untwist_downconversion=untwist_downconversion)
+pulsed = _module(
+    "presto.pulsed",
+    Pulsed=Pulsed,
+    AdcMode=AdcMode,
+    DacMode=DacMode,
+    MAX_TEMPLATE_LEN=MAX_TEMPLATE_LEN,
+    MAX_LUT_ENTRIES=MAX_LUT_ENTRIES,
+)
+lockin = _module(
+    "presto.lockin",
+    Lockin=Lockin,
+    SymmetricLockin=SymmetricLockin,
+    AdcMode=AdcMode,
+    DacMode=DacMode,
+)
+presto = _module(
+    "presto", hardware=hardware, lockin=lockin, pulsed=pulsed, utils=utils, __path__=[]
+)
+
+_MODULES = {
+    "presto": presto,
+    "presto.hardware": hardware,
+    "presto.lockin": lockin,
+    "presto.pulsed": pulsed,
+    "presto.utils": utils,
+}
+
+
+def install():
+    """Make `import presto` and its submodules resolve to the simulator.
+
+    Returns:
+        the entries of `sys.modules` that were replaced, to pass to `uninstall`
+    """
+    previous = {name: sys.modules.get(name) for name in _MODULES}
+    sys.modules.update(_MODULES)
+    return previous
+
+
+def uninstall(previous):
+    for name, module in previous.items():
+        if module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = module
+
+
+@contextlib.contextmanager
+def installed():
+    """Context manager version of `install`."""
+    previous = install()
+    try:
+        yield
+    finally:
+        uninstall(previous)
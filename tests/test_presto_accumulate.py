@@ -0,0 +1,92 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import presto_sim
+from presto_accumulate import Accumulator, SharedView
+
+RUN_KWARGS = {"period": 10e-6, "repeat_count": 4, "num_averages": 1}
+
+
+def _setup(pls):
+    """Store on port 9 and a matching pair on it, as in `demo_6_template_match.py`."""
+    pls.setup_store(9, 1e-6)
+    template = pls.setup_template(9, 0, np.hanning(400))
+    pls.setup_scale_lut(9, 0, np.linspace(1.0, 0.25, RUN_KWARGS["repeat_count"]))
+    t = np.arange(200) / pls.get_fs("adc")
+    pair = pls.setup_template_matching_pair(9, np.cos(2e8 * t), np.sin(2e8 * t))
+
+    def program(pls):
+        pls.output_pulse(0.0, template)
+        pls.store(0.0)
+        pls.match(50e-9, pair)
+        pls.next_scale(5e-6, 9)
+
+    return program, pair
+
+
+def _reader(spec, queue):
+    with SharedView(spec) as view:
+        queue.put(view.snapshot())
+
+
+def test_add_run_sums_and_means():
+    with presto_sim.Pulsed(address="sim") as pls:
+        program, pair = _setup(pls)
+        runs = []
+        with Accumulator(pls, match_pairs=[pair]) as acc:
+            for _ in range(3):
+                program(pls)
+                pls.run(**RUN_KWARGS)
+                acc.add_run()
+                runs.append((pls.get_store_data()[1], pls.get_template_matching_data(pair)))
+
+            assert acc.count == 3
+            store = np.array([data for data, _ in runs])
+            match = np.array([m for _, m in runs])
+            np.testing.assert_allclose(acc.store_sum, store.sum(axis=0))
+            np.testing.assert_allclose(acc.store_mean(), store.mean(axis=0))
+            match_i, match_q = acc.match_mean(pair)
+            np.testing.assert_allclose(match_i, match[:, 0].mean(axis=0))
+            np.testing.assert_allclose(match_q, match[:, 1].mean(axis=0))
+            # the runs differ by their noise only
+            assert not np.array_equal(store[0], store[1])
+            np.testing.assert_allclose(store[0], store[1], atol=1e-3)
+
+    with pytest.raises(RuntimeError, match="closed"):
+        acc.store_mean()
+    with pytest.raises(RuntimeError, match="closed"):
+        acc.match_mean(pair)
+
+
+def test_run_programs_every_run():
+    with presto_sim.Pulsed(address="sim") as pls:
+        program, pair = _setup(pls)
+        calls = []
+        with Accumulator(pls, match_pairs=[pair]) as acc:
+            with pytest.raises(RuntimeError, match="no run"):
+                acc.store_mean()
+            acc.run(3, program, callback=lambda i, a: calls.append((i, a.count)), **RUN_KWARGS)
+            assert calls == [(0, 1), (1, 2), (2, 3)]
+            assert acc.store_mean().shape == (RUN_KWARGS["repeat_count"], 1, len(acc.t_arr))
+            assert np.abs(acc.store_mean()).max() > 0.1
+
+
+def test_shared_view_snapshot_in_other_process():
+    with presto_sim.Pulsed(address="sim") as pls:
+        program, pair = _setup(pls)
+        with Accumulator(pls, match_pairs=[pair], shared=True) as acc:
+            acc.run(2, program, **RUN_KWARGS)
+            context = multiprocessing.get_context("spawn")
+            queue = context.Queue()
+            reader = context.Process(target=_reader, args=(acc.spec, queue))
+            reader.start()
+            count, store, match = queue.get(timeout=60)
+            reader.join(timeout=60)
+
+            assert reader.exitcode == 0
+            assert count == 2
+            np.testing.assert_array_equal(store, acc.store_mean())
+            np.testing.assert_array_equal(match[0][0], acc.match_mean(pair)[0])
+            np.testing.assert_array_equal(match[0][1], acc.match_mean(pair)[1])
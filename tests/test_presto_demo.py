@@ -0,0 +1,22 @@
+import importlib
+
+import presto_sim
+from presto_demo import demos, parameters, source_parameters
+
+
+def test_source_parameters_match_signature():
+    with presto_sim.installed():
+        for name in demos():
+            module = importlib.import_module(name)
+            assert list(source_parameters(name)) == list(parameters(module)), name
+
+
+def test_source_parameters_show_defaults():
+    params = source_parameters("lockin_demo_1")
+    assert params["ext_ref"] == "False"
+    assert params["output_ports"] == "[9, 10]"
+    assert "callback" not in params
+    assert source_parameters("demo_2_all_templates")["input_ports"] == "range(9, 17)"
+    params = source_parameters("symmetric_lockin_1")
+    assert params["ext_ref"] == "False"
+    assert params["df"] == "1.0 * 1e6"
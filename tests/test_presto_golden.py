@@ -0,0 +1,12 @@
+import numpy as np
+import pytest
+
+import presto_golden
+
+
+@pytest.mark.parametrize("name", list(presto_golden.CASES))
+def test_demo_matches_golden(name):
+    with np.load(presto_golden.GOLDEN_DIR / f"{name}.npz") as f:
+        reference = dict(f)
+    actual = presto_golden.measure(name)
+    assert presto_golden.compare(reference, actual, presto_golden.RTOL, presto_golden.ATOL) == []
@@ -0,0 +1,114 @@
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from presto_plot import LiveMonitor, minmax_decimate, plot_grid, plot_image
+
+
+def axes():
+    return FigureCanvasAgg(Figure(figsize=(6.4, 4.8), dpi=100)).figure.add_subplot()
+
+
+def _bin_extrema(y, nr_bins):
+    bins = np.array_split(y, nr_bins, axis=-1)
+    return (
+        np.stack([np.nanmin(b, axis=-1) for b in bins], axis=-1),
+        np.stack([np.nanmax(b, axis=-1) for b in bins], axis=-1),
+    )
+
+
+def test_minmax_decimate_keeps_bin_extrema():
+    rng = np.random.default_rng(0)
+    x = np.arange(1000) * 0.5
+    y = rng.standard_normal((3, 2, 1000))
+    x_dec, y_dec = minmax_decimate(x, y, 100)
+
+    assert y_dec.shape == (3, 2, 200)
+    pairs = y_dec.reshape(3, 2, 100, 2)
+    lo, hi = _bin_extrema(y, 100)
+    np.testing.assert_array_equal(pairs.min(axis=-1), lo)
+    np.testing.assert_array_equal(pairs.max(axis=-1), hi)
+    # points stay in time order and on the original samples
+    assert np.all(np.diff(x_dec, axis=-1) >= 0)
+    np.testing.assert_array_equal(np.take_along_axis(y, (2 * x_dec).astype(int), -1), y_dec)
+
+
+def test_minmax_decimate_skips_nan():
+    y = np.arange(40, dtype=np.float64).reshape(1, 40) % 7
+    y[0, [3, 12, 13, 14]] = np.nan
+    y[0, 20:30] = np.nan  # a whole bin
+    x_dec, y_dec = minmax_decimate(np.arange(40), y, 4)
+
+    pairs = y_dec.reshape(4, 2)
+    lo, hi = _bin_extrema(y[0, :20], 2)
+    np.testing.assert_array_equal(pairs[:2].min(axis=-1), lo)
+    np.testing.assert_array_equal(pairs[:2].max(axis=-1), hi)
+    assert np.isnan(pairs[2]).all()
+    np.testing.assert_array_equal(x_dec[0, 4:6], [20, 20])
+
+
+def _full_draws(monitor, chunks):
+    count = 0
+    draw = monitor.canvas.draw
+
+    def counting_draw():
+        nonlocal count
+        count += 1
+        draw()
+
+    monitor.canvas.draw = counting_draw
+    for i, (x, y) in enumerate(chunks):
+        monitor.update(i, x, y)
+        monitor.draw(force=True)
+    return count
+
+
+def test_live_monitor_sweep_needs_few_full_redraws():
+    chunks = [(np.arange(10) + 10 * i, np.full(10, -i)) for i in range(200)]
+    monitor = LiveMonitor(axes())
+    assert _full_draws(monitor, chunks) <= 2 * np.log2(len(chunks)) + 2
+    assert monitor.ax.get_xlim()[1] >= 1999
+    assert monitor.ax.get_ylim()[0] <= -199
+
+    monitor = LiveMonitor(axes(), xlim=(0, 2000), ylim=(-200, 1))
+    assert _full_draws(monitor, chunks) == 1
+    assert monitor.ax.get_xlim() == (0, 2000)
+
+
+def test_plot_grid_layout():
+    rows, cols, gap = 3, 4, 0.1
+    x = np.linspace(-1.0, 1.0, 1000)
+    traces = np.sin(np.arange(rows * cols)[:, None] + 20 * x).reshape(rows, cols, -1)
+    traces[0, 0] *= 2  # the largest trace spans the whole cell
+
+    ax = axes()
+    nr_bins = int(ax.bbox.width / cols)
+    segments = plot_grid(ax, x, traces, gap=gap).get_segments()
+    assert len(segments) == rows * cols
+    assert all(len(s) == 2 * nr_bins for s in segments)
+    for idx, segment in enumerate(segments):
+        row, col = divmod(idx, cols)
+        left = (1 + gap) * col
+        bottom = (1 + gap) * (rows - 1 - row)  # row 0 on top
+        assert left <= segment[:, 0].min() and segment[:, 0].max() <= left + 1
+        assert bottom <= segment[:, 1].min() and segment[:, 1].max() <= bottom + 1
+    np.testing.assert_allclose(segments[0][:, 1].min(), (1 + gap) * (rows - 1))
+    np.testing.assert_allclose(segments[0][:, 1].max(), (1 + gap) * (rows - 1) + 1)
+    np.testing.assert_allclose(ax.get_xlim(), (-gap / 2, cols * (1 + gap) - gap / 2))
+    np.testing.assert_allclose(ax.get_ylim(), (-gap / 2, rows * (1 + gap) - gap / 2))
+
+    segments = plot_grid(axes(), x, traces, gap=gap, nr_bins=0).get_segments()
+    assert all(len(s) == len(x) for s in segments)
+    for idx, segment in enumerate(segments):
+        left = (1 + gap) * (idx % cols)
+        np.testing.assert_allclose(segment[[0, -1], 0], [left, left + 1])
+
+
+def test_plot_image_rows_are_traces():
+    x = np.linspace(0.0, 2.0, 300)
+    traces = np.arange(50)[:, None] * np.ones(len(x))
+    ax = axes()
+    image = plot_image(ax, x, traces)
+    assert image.get_array().shape == traces.shape
+    assert image.get_extent() == [0.0, 2.0, 49.5, -0.5]  # trace 0 on top
+    np.testing.assert_allclose(ax.get_ylim(), (49.5, -0.5))
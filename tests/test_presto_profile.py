@@ -0,0 +1,72 @@
+import numpy as np
+
+import presto_sim
+from presto_profile import Profiler
+
+
+def test_lockin_groups_are_instrumented():
+    prof = Profiler()
+    with prof.instrument(presto_sim.SymmetricLockin(address="sim")) as lck:
+        sg = lck.add_symmetric_group(10, 10, 4)
+        sg.set_frequencies(np.arange(4) * 1e6).set_amplitudes(0.1).set_phases(0.0)
+        lck.apply_settings()
+        lck.get_pixels(10)
+
+    summary = prof.summary()
+    for name in (
+        "add_symmetric_group",
+        "symmetric_group.set_frequencies",
+        "symmetric_group.set_amplitudes",
+        "symmetric_group.set_phases",
+        "get_pixels",
+    ):
+        assert summary[name]["count"] == 1
+    assert summary["symmetric_group.set_frequencies"]["bytes_in"] == 4 * 8
+    assert summary["get_pixels"]["bytes_out"] > 0
+
+
+def test_self_time_excludes_nested_events():
+    prof = Profiler()
+    with prof.phase("outer"):
+        with prof.phase("inner"):
+            sum(range(100_000))
+    outer, inner = sorted(prof.events, key=lambda ev: ev.start)
+    self_times = dict(zip((ev.name for ev in prof.events), prof.self_times()))
+    assert self_times["inner"] == inner.duration
+    assert np.isclose(self_times["outer"], outer.duration - inner.duration)
+    assert 0 <= self_times["outer"] < outer.duration
+
+
+def test_patched_class_keeps_class_attributes():
+    prof = Profiler()
+    with prof.patch(presto_sim.pulsed, "Pulsed"):
+        patched = presto_sim.pulsed.Pulsed
+        assert patched.FS_DAC == presto_sim.Pulsed.FS_DAC
+        assert issubclass(patched, presto_sim.Pulsed)
+        assert not isinstance(object(), patched)
+        with patched(address="sim") as pls:
+            pls.get_fs("dac")
+    assert presto_sim.pulsed.Pulsed is presto_sim.Pulsed
+    summary = prof.summary()
+    assert summary["Pulsed"]["category"] == "connect"
+    assert summary["get_fs"]["count"] == 1
+
+
+class _Groups:
+    def add_group(self):
+        return presto_sim.SymmetricGroup(10, 10, 2)
+
+    def add_nothing(self):
+        return None
+
+    def add_value(self):
+        return 3
+
+
+def test_only_objects_returned_by_add_are_instrumented():
+    prof = Profiler()
+    groups = prof.instrument(_Groups())
+    assert groups.add_nothing() is None
+    assert groups.add_value() == 3
+    groups.add_group().set_amplitudes(0.1)
+    assert "group.set_amplitudes" in prof.summary()